@@ -4,23 +4,84 @@ Interactive Streamlit app for analyzing poll responses from webinar sessions.
 Run with: uv run streamlit run poll_analysis_app.py
 """
 
+import contextlib
+import io
+import os
+import tempfile
+
+import numpy as np
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import pyarrow as pa
+import pyarrow.csv as pcsv
 import plotly.graph_objects as go
 
 
 @st.cache_data
 def load_data():
     """Load and cache the poll responses data."""
-    df = pd.read_csv("poll-responses.csv")
+    csv_path = "poll-responses.csv"
+    parquet_path = "poll-responses.parquet"
+
+    # Reuse the prepared Parquet copy unless the CSV, or the preparation below, has changed since
+    source_mtime = max(os.path.getmtime(csv_path), os.path.getmtime(__file__))
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= source_mtime:
+        try:
+            return pd.read_parquet(parquet_path)
+        except (OSError, pa.ArrowException):
+            # Unreadable copy (e.g. left truncated by a crash) - rebuild it from the CSV below
+            pass
+
+    df = pd.read_csv(csv_path, engine="pyarrow")
+    # Low-cardinality text columns as categoricals so groupbys work on integer codes
+    for column in [
+        "Month Year",
+        "State",
+        "Webinar Title (Full)",
+        "Population Range",
+        "Question",
+        "City, State",
+    ]:
+        df[column] = df[column].astype("category")
+    # Format dates once (e.g., "January 2024") rather than per session on every rerun
+    df["Formatted Date"] = (
+        pd.to_datetime(df["Webinar Date"].astype(str), format="%Y%m%d").dt.strftime("%B %Y")
+    )
+    # Write to a temporary file and swap it in, so readers never see a partial copy
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            prefix="poll-responses.",
+            suffix=".parquet.tmp",
+            dir=os.path.dirname(os.path.abspath(parquet_path)),
+        )
+    except OSError:
+        # Read-only checkout - parse the CSV again on the next cold start
+        return df
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_path, parquet_path)
+    except (OSError, pa.ArrowException):
+        # The Parquet copy is only a speed-up - serve the frame we already built
+        pass
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
     return df
 
 
-def get_session_summary(df):
+@st.cache_data(ttl=None, show_spinner=False)
+def get_session_summary():
     """Get summary statistics by session."""
+    # Takes no frame argument: the cache key is then free, where hashing a DataFrame argument
+    # would scan every row on each call. load_data() is itself cached.
+    df = load_data()
     summary = (
-        df.groupby(["Webinar Date", "Month Year", "Webinar Title (Full)"])
+        df.groupby(
+            ["Webinar Date", "Month Year", "Webinar Title (Full)", "Formatted Date"],
+            observed=True,
+            sort=False,
+        )
         .agg({"Name": "nunique", "Question": "nunique", "Answer": "count"})
         .rename(
             columns={
@@ -31,26 +92,297 @@ def get_session_summary(df):
         )
         .reset_index()
     )
-    # Sort by date in reverse order (most recent first)
-    summary = summary.sort_values("Webinar Date", ascending=False)
+    # Sort by date in reverse order (most recent first) - one row per session, and cached
+    summary = summary.sort_values("Webinar Date", ascending=False, kind="stable")
     return summary
 
 
-def get_question_totals(df, session_filter=None):
-    """Get totals for each question, optionally filtered by session."""
-    if session_filter:
-        df = df[df["Month Year"] == session_filter]
-
+@st.cache_data(ttl=None, show_spinner=False)
+def get_question_totals():
+    """Get answer totals and percentages for each question."""
+    df = load_data()
+    question_keys = ["Webinar Date", "Month Year", "Webinar Title (Full)", "Formatted Date", "Question"]
     totals = (
-        df.groupby(["Webinar Date", "Month Year", "Webinar Title (Full)", "Question", "Answer"])
-        .size()
-        .reset_index(name="Count")
+        df.groupby(question_keys + ["Answer"], observed=True, sort=False).size().reset_index(name="Count")
     )
-    # Sort by date in reverse order (most recent first)
-    totals = totals.sort_values("Webinar Date", ascending=False)
+    # Share of each answer within its question, in one pass over all questions
+    question_sums = totals.groupby(question_keys, observed=True, sort=False)["Count"].transform("sum")
+    totals["Percentage"] = (totals["Count"] / question_sums * 100).round(1)
     return totals
 
 
+@st.cache_resource(show_spinner=False)
+def build_session_question_index():
+    """Index answer totals and percentages by session, then by question."""
+    # cache_resource, like index_by_session: the frames are only read, so there is no need
+    # to unpickle a copy of each of them on every rerun
+    session_keys = ["Webinar Date", "Month Year", "Webinar Title (Full)", "Formatted Date"]
+    totals = get_question_totals()
+
+    index = {}
+    for (*session_key, question), question_data in totals.groupby(
+        session_keys + ["Question"], observed=True, sort=False
+    ):
+        index.setdefault(tuple(session_key), {})[question] = question_data
+    return index
+
+
+def get_value_counts(df, column, limit=None):
+    """Get response counts per value of a column, most frequent first."""
+    # Group with observed=True rather than value_counts, which also lists every category
+    # that never occurs in this view
+    counts = df.groupby(column, observed=True, sort=False).size()
+    if limit is not None:
+        counts = counts.nlargest(limit)
+    else:
+        counts = counts.sort_values(ascending=False, kind="stable")
+    return counts.rename_axis(column).reset_index(name="Count")
+
+
+def get_top_respondents(df, limit=None):
+    """Get response counts per respondent, most active first."""
+    # Not DataFrame.value_counts: it always groups with observed=False, which would pair every
+    # name with every city category before counting
+    counts = df.groupby(["Name", "City, State"], observed=True, sort=False).size()
+    if limit is not None:
+        counts = counts.nlargest(limit)
+    else:
+        counts = counts.sort_values(ascending=False, kind="stable")
+    return counts.reset_index(name="Response Count")
+
+
+@st.cache_resource(show_spinner=False)
+def index_by_session():
+    """Index the responses by session so a session filter is a dict lookup."""
+    # cache_resource hands back the same dict on each rerun instead of unpickling
+    # a copy of every session's frame, as cache_data would; callers only read it.
+    # No frame argument, so the lookup does not hash every row first.
+    df = load_data()
+    return {
+        month_year: session_df
+        for month_year, session_df in df.groupby("Month Year", observed=True, sort=False)
+    }
+
+
+def make_pie(labels, values, title):
+    """Build a pie chart directly with graph_objects."""
+    fig = go.Figure(go.Pie(labels=list(labels), values=list(values)))
+    fig.update_layout(title=title)
+    return fig
+
+
+def make_bar(labels, values, title, x_title=None, y_title=None):
+    """Build a bar chart directly with graph_objects."""
+    fig = go.Figure(go.Bar(x=list(labels), y=list(values)))
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title)
+    return fig
+
+
+def _sorted_options(series):
+    """Get the sorted distinct values of a column, using category metadata when available."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.remove_unused_categories().cat.categories.tolist()
+    return sorted(series.unique())
+
+
+@st.cache_data(ttl=None, show_spinner=False)
+def get_session_options():
+    """Get the sessions offered by the session filter, oldest first."""
+    df = load_data()
+    session_dates = df[["Webinar Date", "Month Year"]].drop_duplicates()
+    session_dates = session_dates.sort_values("Webinar Date")
+    return session_dates["Month Year"].tolist()
+
+
+@st.fragment
+def render_session_overview(df, sessions):
+    """Render the Session Overview tab."""
+    st.header("Session Overview")
+
+    session_summary = get_session_summary()
+    # Calculate height to show all rows (35px per row + 38px header)
+    table_height = len(session_summary) * 35 + 38
+    st.dataframe(
+        session_summary.drop(columns="Formatted Date"),
+        use_container_width=True,
+        hide_index=True,
+        height=table_height,
+    )
+
+    # Session metrics
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Sessions", len(sessions))
+    with col2:
+        st.metric("Total Respondents", df["Name"].nunique())
+    with col3:
+        st.metric("Total Responses", len(df))
+
+
+@st.fragment
+def render_question_totals(selected_session, fast_render):
+    """Render the Question Totals tab, one section per session."""
+    st.header("Question Totals")
+
+    # Answer totals indexed by session, then by question
+    session_question_index = build_session_question_index()
+
+    # Sessions to show, taken from the summary (already one row per session)
+    session_summary = get_session_summary()
+    if selected_session != "All Sessions":
+        sessions_in_view = session_summary[session_summary["Month Year"] == selected_session]
+    else:
+        sessions_in_view = session_summary
+
+    session_keys = ["Webinar Date", "Month Year", "Webinar Title (Full)", "Formatted Date"]
+    for session_key in sessions_in_view[session_keys].itertuples(index=False, name=None):
+        session_date, _, webinar_title, formatted_date = session_key
+        session_questions = session_question_index.get(session_key)
+        if not session_questions:
+            # Every answer in this session was blank, so there is nothing to total
+            continue
+
+        # Create session header
+        st.subheader(f"📅 {formatted_date} - {webinar_title}")
+
+        for question, question_data in session_questions.items():
+            with st.expander(f"📝 {question}", expanded=False):
+                # Display data
+                display_data = question_data[["Answer", "Count", "Percentage"]].sort_values(
+                    "Count", ascending=False
+                )
+                st.dataframe(display_data, use_container_width=True, hide_index=True)
+
+                # Chart with unique key, only built once the reader asks for it
+                if st.toggle("Show chart", key=f"show_chart_{session_date}_{question}"):
+                    if fast_render:
+                        # Native bar chart ships a much smaller payload than a Plotly figure
+                        st.bar_chart(question_data.set_index("Answer")["Count"])
+                    else:
+                        fig = make_pie(
+                            question_data["Answer"],
+                            question_data["Count"],
+                            "Response Distribution",
+                        )
+                        st.plotly_chart(fig, use_container_width=True, key=f"chart_{session_date}_{question}")
+
+        st.markdown("---")
+
+
+@st.fragment
+def render_individual_responses(filtered_df):
+    """Render the Individual Responses tab with its respondent and city filters."""
+    st.header("Individual Responses")
+
+    # Additional filters for individual responses
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Respondent filter
+        respondents = _sorted_options(filtered_df["Name"])
+        selected_respondent = st.selectbox(
+            "Filter by Respondent",
+            ["All Respondents"] + respondents,
+            index=0,
+        )
+
+    with col2:
+        # City filter
+        cities = _sorted_options(filtered_df["City, State"])
+        selected_city = st.selectbox(
+            "Filter by City",
+            ["All Cities"] + cities,
+            index=0,
+        )
+
+    # Apply additional filters as one combined mask (display_df is only read, so no copy is needed)
+    display_df = filtered_df
+
+    if selected_respondent != "All Respondents" or selected_city != "All Cities":
+        mask = np.ones(len(filtered_df), dtype=bool)
+        if selected_respondent != "All Respondents":
+            mask &= (filtered_df["Name"] == selected_respondent).to_numpy()
+        if selected_city != "All Cities":
+            mask &= (filtered_df["City, State"] == selected_city).to_numpy()
+        display_df = filtered_df[mask]
+
+    # Preview size - the full set stays available through the CSV download
+    preview_rows = st.number_input("Rows to preview", min_value=1, value=1000, step=500)
+
+    # Display count
+    if len(display_df) > preview_rows:
+        st.info(
+            f"Showing the first {preview_rows:,} of {len(display_df):,} responses. "
+            "Download the CSV below for the full set."
+        )
+    else:
+        st.info(f"Showing {len(display_df)} responses")
+
+    # Display data
+    display_columns = [
+        "Webinar Date",
+        "Month Year",
+        "Webinar Title (Full)",
+        "Name",
+        "City, State",
+        "State",
+        "Population Range",
+        "Question",
+        "Answer",
+    ]
+
+    st.dataframe(
+        display_df[display_columns].head(preview_rows),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    # Download button - PyArrow writes the CSV straight to bytes, without the derived date column
+    csv_buffer = io.BytesIO()
+    export_df = display_df.drop(columns="Formatted Date")
+    pcsv.write_csv(pa.Table.from_pandas(export_df, preserve_index=False), csv_buffer)
+    st.download_button(
+        label="📥 Download Filtered Data as CSV",
+        data=csv_buffer.getvalue(),
+        file_name="filtered_poll_responses.csv",
+        mime="text/csv",
+    )
+
+
+@st.fragment
+def render_analytics(filtered_df):
+    """Render the Analytics tab for the current session and question selection."""
+    st.header("Analytics Dashboard")
+
+    # Response distribution by state
+    st.subheader("Responses by State")
+    top_states = get_value_counts(filtered_df, "State", limit=20)
+    fig = make_bar(
+        top_states["State"],
+        top_states["Count"],
+        "Top 20 States by Response Count",
+        x_title="State",
+        y_title="Count",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Population range distribution
+    st.subheader("Responses by Population Range")
+    pop_counts = get_value_counts(filtered_df, "Population Range")
+
+    fig = make_pie(
+        pop_counts["Population Range"],
+        pop_counts["Count"],
+        "Distribution by City Population Range",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Top respondents
+    st.subheader("Most Active Respondents")
+    top_respondents = get_top_respondents(filtered_df, limit=15)
+    st.dataframe(top_respondents, use_container_width=True, hide_index=True)
+
+
 def main():
     st.set_page_config(page_title="Poll Response Analysis", layout="wide")
 
@@ -69,9 +401,7 @@ def main():
     st.sidebar.header("Filters")
 
     # Session filter - sort by date
-    session_dates = df[["Webinar Date", "Month Year"]].drop_duplicates()
-    session_dates = session_dates.sort_values("Webinar Date")
-    sessions = session_dates["Month Year"].tolist()
+    sessions = get_session_options()
     selected_session = st.sidebar.selectbox(
         "Select Session",
         ["All Sessions"] + sessions,
@@ -80,12 +410,12 @@ def main():
 
     # Apply session filter
     if selected_session != "All Sessions":
-        filtered_df = df[df["Month Year"] == selected_session]
+        filtered_df = index_by_session()[selected_session]
     else:
         filtered_df = df
 
     # Question filter
-    questions = sorted(filtered_df["Question"].unique())
+    questions = _sorted_options(filtered_df["Question"])
     selected_question = st.sidebar.selectbox(
         "Select Question",
         ["All Questions"] + questions,
@@ -96,201 +426,30 @@ def main():
     if selected_question != "All Questions":
         filtered_df = filtered_df[filtered_df["Question"] == selected_question]
 
+    # Chart rendering mode
+    fast_render = st.sidebar.toggle(
+        "Fast render mode",
+        value=True,
+        help="Draw question charts as native bar charts instead of Plotly pie charts.",
+    )
+
     # Main content tabs
     tab1, tab2, tab3, tab4 = st.tabs(
         ["📈 Session Overview", "📊 Question Totals", "🔍 Individual Responses", "📉 Analytics"]
     )
 
-    # Tab 1: Session Overview
+    # Each tab is a fragment, so widgets inside a tab only rerun that tab
     with tab1:
-        st.header("Session Overview")
-
-        session_summary = get_session_summary(df)
-        # Calculate height to show all rows (35px per row + 38px header)
-        table_height = len(session_summary) * 35 + 38
-        st.dataframe(
-            session_summary,
-            use_container_width=True,
-            hide_index=True,
-            height=table_height,
-        )
+        render_session_overview(df, sessions)
 
-        # Session metrics
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Total Sessions", len(sessions))
-        with col2:
-            st.metric("Total Respondents", df["Name"].nunique())
-        with col3:
-            st.metric("Total Responses", len(df))
-
-    # Tab 2: Question Totals
     with tab2:
-        st.header("Question Totals")
-
-        # Get question totals
-        question_totals = get_question_totals(
-            df,
-            session_filter=None if selected_session == "All Sessions" else selected_session,
-        )
+        render_question_totals(selected_session, fast_render)
 
-        # Group by session (Webinar Date, Month Year, Webinar Title)
-        sessions_in_view = question_totals[["Webinar Date", "Month Year", "Webinar Title (Full)"]].drop_duplicates()
-
-        for _, session_row in sessions_in_view.iterrows():
-            session_date = session_row["Webinar Date"]
-            month_year = session_row["Month Year"]
-            webinar_title = session_row["Webinar Title (Full)"]
-
-            # Format date nicely (e.g., "January 2024")
-            formatted_date = pd.to_datetime(str(session_date), format="%Y%m%d").strftime("%B %Y")
-
-            # Create session header
-            st.subheader(f"📅 {formatted_date} - {webinar_title}")
-
-            # Filter data for this session
-            session_data = question_totals[
-                (question_totals["Webinar Date"] == session_date) &
-                (question_totals["Month Year"] == month_year) &
-                (question_totals["Webinar Title (Full)"] == webinar_title)
-            ]
-
-            # Group by question for this session
-            questions_in_session = session_data["Question"].unique()
-
-            for question in questions_in_session:
-                with st.expander(f"📝 {question}", expanded=False):
-                    question_data = session_data[session_data["Question"] == question]
-
-                    # Calculate percentages
-                    total = question_data["Count"].sum()
-                    question_data = question_data.copy()
-                    question_data["Percentage"] = (
-                        question_data["Count"] / total * 100
-                    ).round(1)
-
-                    # Display data
-                    display_data = question_data[["Answer", "Count", "Percentage"]].sort_values(
-                        "Count", ascending=False
-                    )
-                    st.dataframe(display_data, use_container_width=True, hide_index=True)
-
-                    # Pie chart with unique key
-                    fig = px.pie(
-                        question_data,
-                        values="Count",
-                        names="Answer",
-                        title="Response Distribution",
-                    )
-                    st.plotly_chart(fig, use_container_width=True, key=f"chart_{session_date}_{question}")
-
-            st.markdown("---")
-
-    # Tab 3: Individual Responses
     with tab3:
-        st.header("Individual Responses")
-
-        # Additional filters for individual responses
-        col1, col2 = st.columns(2)
-
-        with col1:
-            # Respondent filter
-            respondents = sorted(filtered_df["Name"].unique())
-            selected_respondent = st.selectbox(
-                "Filter by Respondent",
-                ["All Respondents"] + respondents,
-                index=0,
-            )
-
-        with col2:
-            # City filter
-            cities = sorted(filtered_df["City, State"].unique())
-            selected_city = st.selectbox(
-                "Filter by City",
-                ["All Cities"] + cities,
-                index=0,
-            )
-
-        # Apply additional filters
-        display_df = filtered_df.copy()
-
-        if selected_respondent != "All Respondents":
-            display_df = display_df[display_df["Name"] == selected_respondent]
-
-        if selected_city != "All Cities":
-            display_df = display_df[display_df["City, State"] == selected_city]
+        render_individual_responses(filtered_df)
 
-        # Display count
-        st.info(f"Showing {len(display_df)} responses")
-
-        # Display data
-        display_columns = [
-            "Webinar Date",
-            "Month Year",
-            "Webinar Title (Full)",
-            "Name",
-            "City, State",
-            "State",
-            "Population Range",
-            "Question",
-            "Answer",
-        ]
-
-        st.dataframe(
-            display_df[display_columns],
-            use_container_width=True,
-            hide_index=True,
-        )
-
-        # Download button
-        csv = display_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Filtered Data as CSV",
-            data=csv,
-            file_name="filtered_poll_responses.csv",
-            mime="text/csv",
-        )
-
-    # Tab 4: Analytics
     with tab4:
-        st.header("Analytics Dashboard")
-
-        # Response distribution by state
-        st.subheader("Responses by State")
-        state_counts = filtered_df["State"].value_counts().reset_index()
-        state_counts.columns = ["State", "Count"]
-
-        fig = px.bar(
-            state_counts.head(20),
-            x="State",
-            y="Count",
-            title="Top 20 States by Response Count",
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-        # Population range distribution
-        st.subheader("Responses by Population Range")
-        pop_counts = filtered_df["Population Range"].value_counts().reset_index()
-        pop_counts.columns = ["Population Range", "Count"]
-
-        fig = px.pie(
-            pop_counts,
-            values="Count",
-            names="Population Range",
-            title="Distribution by City Population Range",
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-        # Top respondents
-        st.subheader("Most Active Respondents")
-        top_respondents = (
-            filtered_df.groupby(["Name", "City, State"])
-            .size()
-            .reset_index(name="Response Count")
-            .sort_values("Response Count", ascending=False)
-            .head(15)
-        )
-        st.dataframe(top_respondents, use_container_width=True, hide_index=True)
+        render_analytics(filtered_df)
 
 
 if __name__ == "__main__":